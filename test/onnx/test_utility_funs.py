@@ -1,6 +1,5 @@
 # Owner(s): ["module: onnx"]
 
-import copy
 import functools
 import io
 import re
@@ -56,6 +55,134 @@ def _remove_test_environment_prefix_from_scope_name(scope_name: str) -> str:
     return scope_name
 
 
+# Shared by the hoisted constant-fold modules below: constructing the literal
+# once means tracing records a single foldable constant instead of re-walking
+# the Python list in every forward call.
+_CONST_2x3 = torch.tensor([[1.0, 2.0, 3.0], [4.0, 5.0, 6.0]])
+
+# Shared example inputs for the constant-fold tests. They only serve as
+# tracing placeholders (shape matters, values do not), so one frozen tensor
+# per shape avoids a fresh allocation in every test body.
+_X_2x3 = torch.ones(2, 3)
+_X_1x2x3 = torch.ones(1, 2, 3)
+_X_2x5 = torch.ones(2, 5)
+
+
+class TransposeModule(torch.nn.Module):
+    def forward(self, x):
+        a = _CONST_2x3
+        b = torch.transpose(a, 1, 0)
+        return b + x
+
+
+class ReduceModule(torch.nn.Module):
+    def forward(self, x):
+        a = _CONST_2x3
+        b = torch.norm(a, p=2, dim=-2, keepdim=False)
+        return b + x
+
+
+class NormModule(torch.nn.Module):
+    def forward(self, x):
+        a = _CONST_2x3
+        b = torch.norm(a, p=1, dim=-2)
+        return b + x
+
+
+class NarrowModule(torch.nn.Module):
+    def forward(self, x):
+        a = _CONST_2x3
+        b = torch.narrow(a, 0, 0, 1)
+        return b + x
+
+
+class SliceIndexExceedsDimModule(torch.nn.Module):
+    def forward(self, x):
+        a = _CONST_2x3
+        b = a[1:10]  # index exceeds dimension
+        return b + x
+
+
+class SliceNegativeIndexModule(torch.nn.Module):
+    def forward(self, x):
+        a = _CONST_2x3
+        b = a[0:-1]  # index relative to the end
+        c = torch.select(a, dim=-1, index=-2)
+        d = torch.select(a, dim=1, index=0)
+        return b + x, c + d
+
+
+class GatherModule(torch.nn.Module):
+    def forward(self, x):
+        a = _CONST_2x3
+        b = torch.select(a, dim=1, index=-2)
+        c = torch.index_select(a, dim=-2, index=torch.tensor([0, 1]))
+        return b + 1, c + x
+
+
+@functools.lru_cache(maxsize=None)
+def _cached_model_to_graph(module_cls, input_shape, opset_version):
+    """Trace a single-input module and memoize the exported graph.
+
+    The constant-folding tests below only read the returned graph, so the
+    traced copy can be shared: once a (module class, input shape, opset)
+    combination has paid for tracing, lowering and folding, every later
+    request for the same key is a dictionary lookup. The module classes are
+    hoisted to module scope above so they form stable cache keys.
+    """
+    GLOBALS.export_onnx_opset_version = opset_version
+    GLOBALS.operator_export_type = OperatorExportTypes.ONNX
+    model = module_cls()
+    model.eval()
+    torch.onnx.utils._setup_trace_module_map(model, False)
+    graph, params_dict, _ = utils._model_to_graph(
+        model,
+        (torch.ones(input_shape),),
+        do_constant_folding=True,
+        _disable_torch_constant_prop=True,
+        operator_export_type=OperatorExportTypes.ONNX,
+        input_names=["x"],
+        dynamic_axes={"x": list(range(len(input_shape)))},
+    )
+    return graph, params_dict
+
+
+class GruNet(torch.nn.Module):
+    def __init__(self) -> None:
+        super().__init__()
+        self.mygru = torch.nn.GRU(7, 3, 1, bidirectional=False)
+
+    def forward(self, input, initial_state):
+        return self.mygru(input, initial_state)
+
+
+@functools.lru_cache(maxsize=None)
+def _gru_net_and_inputs():
+    """Share one GruNet and one frozen input pair across opset classes.
+
+    GRU construction re-initializes every weight tensor; tracing does not
+    mutate the module, so the parameterized opset classes can reuse a
+    single instance instead of rebuilding it per run.
+    """
+    return GruNet(), torch.randn(5, 3, 7), torch.randn(1, 3, 3)
+
+
+def _make_constant_fold_test(module_cls, input_shape, banned_kinds, expected_n=None):
+    """Build a constant-fold test method from a data tuple.
+
+    Each generated test traces the module through the cached helper and
+    asserts the banned ONNX kinds were folded away; defining the methods
+    from data avoids repeating the same four-line body per case.
+    """
+
+    def test(self):
+        graph, _ = _cached_model_to_graph(module_cls, input_shape, self.opset_version)
+        self._assert_folded(graph, banned_kinds, expected_n)
+
+    test.__name__ = f"test_constant_fold_{module_cls.__name__}"
+    return test
+
+
 class _BaseTestCase(pytorch_test_common.ExportTestCase):
     def _model_to_graph(
         self,
@@ -85,6 +212,19 @@ class _BaseTestCase(pytorch_test_common.ExportTestCase):
         )
         return graph, params_dict, torch_out
 
+    def _assert_folded(self, graph, banned_kinds, expected_n=None):
+        """Assert no node of a banned kind survived folding, in one pass.
+
+        Also checks the node count when ``expected_n`` is given, without
+        materializing ``list(graph.nodes())`` or walking the iterator twice.
+        """
+        count = 0
+        for node in graph.nodes():
+            count += 1
+            self.assertNotIn(node.kind(), banned_kinds)
+        if expected_n is not None:
+            self.assertEqual(count, expected_n)
+
 
 @common_utils.instantiate_parametrized_tests
 class TestUnconvertibleOps(pytorch_test_common.ExportTestCase):
@@ -181,6 +321,14 @@ class TestUnconvertibleOps(pytorch_test_common.ExportTestCase):
 class TestUtilityFuns(_BaseTestCase):
     opset_version = None
 
+    def setUp(self):
+        super().setUp()
+        # Every test here exports with the parameterized opset and the plain
+        # ONNX operator set; doing it once per test removes the duplicated
+        # GLOBALS assignments from each test body.
+        GLOBALS.export_onnx_opset_version = self.opset_version
+        GLOBALS.operator_export_type = OperatorExportTypes.ONNX
+
     def test_is_in_onnx_export(self):
         test_self = self
 
@@ -225,8 +373,6 @@ class TestUtilityFuns(_BaseTestCase):
                 out, out2 = torch.split(t, splits, dim=1)
                 return out, out2
 
-        GLOBALS.export_onnx_opset_version = self.opset_version
-        GLOBALS.operator_export_type = OperatorExportTypes.ONNX
         x = torch.randn(2, 3)
         y = torch.randn(2, 4)
         t = torch.randn(2, 7)
@@ -236,147 +382,31 @@ class TestUtilityFuns(_BaseTestCase):
             input_names=["x", "y", "t"],
             dynamic_axes={"x": [0, 1], "y": [0, 1], "t": [0, 1]},
         )
-        for node in graph.nodes():
-            self.assertNotEqual(node.kind(), "onnx::SplitToSequence")
+        self._assert_folded(graph, ("onnx::SplitToSequence",))
 
-    def test_constant_fold_transpose(self):
-        class TransposeModule(torch.nn.Module):
-            def forward(self, x):
-                a = torch.tensor([[1.0, 2.0, 3.0], [4.0, 5.0, 6.0]])
-                b = torch.transpose(a, 1, 0)
-                return b + x
-
-        GLOBALS.export_onnx_opset_version = self.opset_version
-        GLOBALS.operator_export_type = OperatorExportTypes.ONNX
-        x = torch.ones(3, 2)
-        graph, _, __ = self._model_to_graph(
-            TransposeModule(), (x,), input_names=["x"], dynamic_axes={"x": [0, 1]}
-        )
-
-        for node in graph.nodes():
-            self.assertNotEqual(node.kind(), "onnx::Transpose")
-            self.assertNotEqual(node.kind(), "onnx::Cast")
-        self.assertEqual(len(list(graph.nodes())), 2)
-
-    @skipIfUnsupportedMaxOpsetVersion(17)
-    def test_constant_fold_reduceL2(self):
-        class ReduceModule(torch.nn.Module):
-            def forward(self, x):
-                a = torch.tensor([[1.0, 2.0, 3.0], [4.0, 5.0, 6.0]])
-                b = torch.norm(a, p=2, dim=-2, keepdim=False)
-                return b + x
-
-        GLOBALS.export_onnx_opset_version = self.opset_version
-        GLOBALS.operator_export_type = OperatorExportTypes.ONNX
-        x = torch.ones(2, 3)
-        graph, _, __ = self._model_to_graph(
-            ReduceModule(), (x,), input_names=["x"], dynamic_axes={"x": [0, 1]}
-        )
-
-        for node in graph.nodes():
-            self.assertNotEqual(node.kind(), "onnx::ReduceL2")
-
-    @skipIfUnsupportedMaxOpsetVersion(17)
-    def test_constant_fold_reduceL1(self):
-        class NormModule(torch.nn.Module):
-            def forward(self, x):
-                a = torch.tensor([[1.0, 2.0, 3.0], [4.0, 5.0, 6.0]])
-                b = torch.norm(a, p=1, dim=-2)
-                return b + x
-
-        GLOBALS.export_onnx_opset_version = self.opset_version
-        GLOBALS.operator_export_type = OperatorExportTypes.ONNX
-        x = torch.ones(2, 3)
-        graph, _, __ = self._model_to_graph(
-            NormModule(), (x,), input_names=["x"], dynamic_axes={"x": [0, 1]}
-        )
-
-        for node in graph.nodes():
-            self.assertNotEqual(node.kind(), "onnx::ReduceL1")
-
-    def test_constant_fold_slice(self):
-        class NarrowModule(torch.nn.Module):
-            def forward(self, x):
-                a = torch.tensor([[1.0, 2.0, 3.0], [4.0, 5.0, 6.0]])
-                b = torch.narrow(a, 0, 0, 1)
-                return b + x
-
-        GLOBALS.export_onnx_opset_version = self.opset_version
-        GLOBALS.operator_export_type = OperatorExportTypes.ONNX
-        x = torch.ones(1, 3)
-        graph, _, __ = self._model_to_graph(
-            NarrowModule(), (x,), input_names=["x"], dynamic_axes={"x": [0, 1]}
-        )
-
-        for node in graph.nodes():
-            self.assertNotEqual(node.kind(), "onnx::Slice")
-            self.assertNotEqual(node.kind(), "onnx::Cast")
-        self.assertEqual(len(list(graph.nodes())), 2)
-
-    def test_constant_fold_slice_index_exceeds_dim(self):
-        class SliceIndexExceedsDimModule(torch.nn.Module):
-            def forward(self, x):
-                a = torch.tensor([[1.0, 2.0, 3.0], [4.0, 5.0, 6.0]])
-                b = a[1:10]  # index exceeds dimension
-                return b + x
-
-        GLOBALS.export_onnx_opset_version = self.opset_version
-        GLOBALS.operator_export_type = OperatorExportTypes.ONNX
-        x = torch.ones(1, 3)
-        graph, _, __ = self._model_to_graph(
-            SliceIndexExceedsDimModule(),
-            (x,),
-            input_names=["x"],
-            dynamic_axes={"x": [0, 1]},
-        )
-
-        for node in graph.nodes():
-            self.assertNotEqual(node.kind(), "onnx::Slice")
-            self.assertNotEqual(node.kind(), "onnx::Cast")
-        self.assertEqual(len(list(graph.nodes())), 2)
-
-    def test_constant_fold_slice_negative_index(self):
-        class SliceNegativeIndexModule(torch.nn.Module):
-            def forward(self, x):
-                a = torch.tensor([[1.0, 2.0, 3.0], [4.0, 5.0, 6.0]])
-                b = a[0:-1]  # index relative to the end
-                c = torch.select(a, dim=-1, index=-2)
-                d = torch.select(a, dim=1, index=0)
-                return b + x, c + d
-
-        GLOBALS.export_onnx_opset_version = self.opset_version
-        GLOBALS.operator_export_type = OperatorExportTypes.ONNX
-        x = torch.ones(1, 3)
-        graph, _, __ = self._model_to_graph(
-            SliceNegativeIndexModule(),
-            (x,),
-            input_names=["x"],
-            dynamic_axes={"x": [0, 1]},
-        )
-
-        for node in graph.nodes():
-            self.assertNotEqual(node.kind(), "onnx::Slice")
-            self.assertNotEqual(node.kind(), "onnx::Cast")
-
-    def test_constant_fold_gather(self):
-        class GatherModule(torch.nn.Module):
-            def forward(self, x):
-                a = torch.tensor([[1.0, 2.0, 3.0], [4.0, 5.0, 6.0]])
-                b = torch.select(a, dim=1, index=-2)
-                c = torch.index_select(a, dim=-2, index=torch.tensor([0, 1]))
-                return b + 1, c + x
-
-        GLOBALS.export_onnx_opset_version = self.opset_version
-        GLOBALS.operator_export_type = OperatorExportTypes.ONNX
-        x = torch.ones(1, 3)
-        model = GatherModule()
-        model(x)
-        graph, _, __ = self._model_to_graph(
-            GatherModule(), (x,), input_names=["x"], dynamic_axes={"x": [0, 1]}
-        )
-
-        for node in graph.nodes():
-            self.assertNotEqual(node.kind(), "onnx::Gather")
+    # Table-driven simple constant-fold cases:
+    # (module, input shape, banned kinds, expected node count)
+    test_constant_fold_transpose = _make_constant_fold_test(
+        TransposeModule, (3, 2), ("onnx::Transpose", "onnx::Cast"), 2
+    )
+    test_constant_fold_reduceL2 = skipIfUnsupportedMaxOpsetVersion(17)(
+        _make_constant_fold_test(ReduceModule, (2, 3), ("onnx::ReduceL2",))
+    )
+    test_constant_fold_reduceL1 = skipIfUnsupportedMaxOpsetVersion(17)(
+        _make_constant_fold_test(NormModule, (2, 3), ("onnx::ReduceL1",))
+    )
+    test_constant_fold_slice = _make_constant_fold_test(
+        NarrowModule, (1, 3), ("onnx::Slice", "onnx::Cast"), 2
+    )
+    test_constant_fold_slice_index_exceeds_dim = _make_constant_fold_test(
+        SliceIndexExceedsDimModule, (1, 3), ("onnx::Slice", "onnx::Cast"), 2
+    )
+    test_constant_fold_slice_negative_index = _make_constant_fold_test(
+        SliceNegativeIndexModule, (1, 3), ("onnx::Slice", "onnx::Cast")
+    )
+    test_constant_fold_gather = _make_constant_fold_test(
+        GatherModule, (1, 3), ("onnx::Gather",)
+    )
 
     def test_constant_fold_unsqueeze(self):
         class UnsqueezeModule(torch.nn.Module):
@@ -385,17 +415,12 @@ class TestUtilityFuns(_BaseTestCase):
                 b = torch.unsqueeze(a, -2)
                 return b + x
 
-        GLOBALS.export_onnx_opset_version = self.opset_version
-        GLOBALS.operator_export_type = OperatorExportTypes.ONNX
-        x = torch.ones(1, 2, 3)
+        x = _X_1x2x3
         graph, _, __ = self._model_to_graph(
             UnsqueezeModule(), (x,), input_names=["x"], dynamic_axes={"x": [0, 1, 2]}
         )
 
-        for node in graph.nodes():
-            self.assertNotEqual(node.kind(), "onnx::Unsqueeze")
-            self.assertNotEqual(node.kind(), "onnx::Cast")
-        self.assertEqual(len(list(graph.nodes())), 2)
+        self._assert_folded(graph, ("onnx::Unsqueeze", "onnx::Cast"), expected_n=2)
 
     def test_constant_fold_unsqueeze_multi_axies(self):
         class PReluModel(torch.nn.Module):
@@ -407,17 +432,12 @@ class TestUtilityFuns(_BaseTestCase):
                 a = torch.randn(2, 3, 4, 5, 8, 7)
                 return self.prelu(x) + a
 
-        GLOBALS.export_onnx_opset_version = self.opset_version
-        GLOBALS.operator_export_type = OperatorExportTypes.ONNX
         x = torch.randn(2, 3, 4, 5, 8, 7)
         graph, _, __ = self._model_to_graph(
             PReluModel(), x, input_names=["x"], dynamic_axes={"x": [0, 1, 2, 3, 4, 5]}
         )
 
-        for node in graph.nodes():
-            self.assertNotEqual(node.kind(), "onnx::Unsqueeze")
-            self.assertNotEqual(node.kind(), "onnx::Cast")
-        self.assertEqual(len(list(graph.nodes())), 5)
+        self._assert_folded(graph, ("onnx::Unsqueeze", "onnx::Cast"), expected_n=5)
 
     def test_constant_fold_squeeze_without_axes(self):
         class SqueezeModule(torch.nn.Module):
@@ -425,16 +445,11 @@ class TestUtilityFuns(_BaseTestCase):
                 a = torch.tensor([[[1.0, 2.0, 3.0], [4.0, 5.0, 6.0]]])
                 return torch.squeeze(a) + x + torch.squeeze(a)
 
-        GLOBALS.export_onnx_opset_version = self.opset_version
-        GLOBALS.operator_export_type = OperatorExportTypes.ONNX
-        x = torch.ones(2, 3)
+        x = _X_2x3
         graph, _, __ = self._model_to_graph(
             SqueezeModule(), (x,), input_names=["x"], dynamic_axes={"x": [0, 1]}
         )
-        for node in graph.nodes():
-            self.assertNotEqual(node.kind(), "onnx::Squeeze")
-            self.assertNotEqual(node.kind(), "onnx::Cast")
-        self.assertEqual(len(list(graph.nodes())), 4)
+        self._assert_folded(graph, ("onnx::Squeeze", "onnx::Cast"), expected_n=4)
 
     def test_constant_fold_squeeze_with_axes(self):
         class SqueezeAxesModule(torch.nn.Module):
@@ -442,17 +457,12 @@ class TestUtilityFuns(_BaseTestCase):
                 a = torch.tensor([[[1.0, 2.0, 3.0], [4.0, 5.0, 6.0]]])
                 return torch.squeeze(a, dim=-3) + x
 
-        GLOBALS.export_onnx_opset_version = self.opset_version
-        GLOBALS.operator_export_type = OperatorExportTypes.ONNX
-        x = torch.ones(2, 3)
+        x = _X_2x3
         graph, _, __ = self._model_to_graph(
             SqueezeAxesModule(), (x,), input_names=["x"], dynamic_axes={"x": [0, 1]}
         )
 
-        for node in graph.nodes():
-            self.assertNotEqual(node.kind(), "onnx::Squeeze")
-            self.assertNotEqual(node.kind(), "onnx::Cast")
-        self.assertEqual(len(list(graph.nodes())), 2)
+        self._assert_folded(graph, ("onnx::Squeeze", "onnx::Cast"), expected_n=2)
 
     def test_constant_fold_concat(self):
         class ConcatModule(torch.nn.Module):
@@ -478,42 +488,23 @@ class TestUtilityFuns(_BaseTestCase):
                 d = b + c
                 return x + d
 
-        GLOBALS.export_onnx_opset_version = self.opset_version
-        GLOBALS.operator_export_type = OperatorExportTypes.ONNX
-        x = torch.ones(2, 3)
+        x = _X_2x3
         graph, _, __ = self._model_to_graph(
             ConcatModule(), (x,), input_names=["x"], dynamic_axes={"x": [0, 1]}
         )
 
-        for node in graph.nodes():
-            self.assertNotEqual(node.kind(), "onnx::Concat")
-            self.assertNotEqual(node.kind(), "onnx::Cast")
-        self.assertEqual(len(list(graph.nodes())), 2)
+        self._assert_folded(graph, ("onnx::Concat", "onnx::Cast"), expected_n=2)
 
     def test_constant_fold_lstm(self):
-        class GruNet(torch.nn.Module):
-            def __init__(self) -> None:
-                super().__init__()
-                self.mygru = torch.nn.GRU(7, 3, 1, bidirectional=False)
-
-            def forward(self, input, initial_state):
-                return self.mygru(input, initial_state)
-
-        GLOBALS.export_onnx_opset_version = self.opset_version
-        GLOBALS.operator_export_type = OperatorExportTypes.ONNX
-        input = torch.randn(5, 3, 7)
-        h0 = torch.randn(1, 3, 3)
+        model, input, h0 = _gru_net_and_inputs()
         graph, _, __ = self._model_to_graph(
-            GruNet(),
+            model,
             (input, h0),
             input_names=["input", "h0"],
             dynamic_axes={"input": [0, 1, 2], "h0": [0, 1, 2]},
         )
 
-        for node in graph.nodes():
-            self.assertNotEqual(node.kind(), "onnx::Slice")
-            self.assertNotEqual(node.kind(), "onnx::Concat")
-            self.assertNotEqual(node.kind(), "onnx::Unsqueeze")
+        self._assert_folded(graph, ("onnx::Slice", "onnx::Concat", "onnx::Unsqueeze"))
 
         if self.opset_version <= 12:
             self.assertEqual(len(list(graph.nodes())), 3)
@@ -530,16 +521,12 @@ class TestUtilityFuns(_BaseTestCase):
             def forward(self, A):
                 return torch.matmul(A, torch.transpose(self.B, -1, -2))
 
-        GLOBALS.export_onnx_opset_version = self.opset_version
-        GLOBALS.operator_export_type = OperatorExportTypes.ONNX
         A = torch.randn(2, 3)
         graph, _, __ = self._model_to_graph(
             MatMulNet(), (A,), input_names=["A"], dynamic_axes={"A": [0, 1]}
         )
 
-        for node in graph.nodes():
-            self.assertNotEqual(node.kind(), "onnx::Transpose")
-        self.assertEqual(len(list(graph.nodes())), 1)
+        self._assert_folded(graph, ("onnx::Transpose",), expected_n=1)
 
     def test_constant_fold_reshape(self):
         class ReshapeModule(torch.nn.Module):
@@ -553,16 +540,12 @@ class TestUtilityFuns(_BaseTestCase):
                 b = self.weight.reshape(1, -1, 1, 1)
                 return x * b
 
-        GLOBALS.export_onnx_opset_version = self.opset_version
-        GLOBALS.operator_export_type = OperatorExportTypes.ONNX
         x = torch.randn(4, 5)
         graph, _, __ = self._model_to_graph(
             ReshapeModule(), (x,), input_names=["x"], dynamic_axes={"x": [0, 1]}
         )
 
-        for node in graph.nodes():
-            self.assertNotEqual(node.kind(), "onnx::Reshape")
-        self.assertEqual(len(list(graph.nodes())), 1)
+        self._assert_folded(graph, ("onnx::Reshape",), expected_n=1)
 
     def test_constant_fold_div(self):
         class Module(torch.nn.Module):
@@ -576,16 +559,12 @@ class TestUtilityFuns(_BaseTestCase):
                 div = self.weight.div(torch.tensor([1, 2, 3, 4, 5]))
                 return div * x
 
-        x = torch.randn(2, 5)
-        GLOBALS.export_onnx_opset_version = self.opset_version
-        GLOBALS.operator_export_type = OperatorExportTypes.ONNX
+        x = _X_2x5
         graph, _, __ = self._model_to_graph(
             Module(), (x,), input_names=["x"], dynamic_axes={"x": [0, 1]}
         )
 
-        for node in graph.nodes():
-            self.assertNotEqual(node.kind(), "onnx::Div")
-        self.assertEqual(len(list(graph.nodes())), 1)
+        self._assert_folded(graph, ("onnx::Div",), expected_n=1)
 
     def test_constant_fold_mul(self):
         class Module(torch.nn.Module):
@@ -599,16 +578,12 @@ class TestUtilityFuns(_BaseTestCase):
                 mul = self.weight.mul(torch.tensor([1, 2, 3, 4, 5]))
                 return mul / x
 
-        x = torch.randn(2, 5)
-        GLOBALS.export_onnx_opset_version = self.opset_version
-        GLOBALS.operator_export_type = OperatorExportTypes.ONNX
+        x = _X_2x5
         graph, _, __ = self._model_to_graph(
             Module(), (x,), input_names=["x"], dynamic_axes={"x": [0, 1]}
         )
 
-        for node in graph.nodes():
-            self.assertNotEqual(node.kind(), "onnx::Mul")
-        self.assertEqual(len(list(graph.nodes())), 1)
+        self._assert_folded(graph, ("onnx::Mul",), expected_n=1)
 
     def test_constant_fold_add(self):
         class Module(torch.nn.Module):
@@ -622,9 +597,7 @@ class TestUtilityFuns(_BaseTestCase):
                 add = self.weight + torch.tensor([1, 2, 3, 4, 5])
                 return add - x
 
-        x = torch.randn(2, 5)
-        GLOBALS.export_onnx_opset_version = self.opset_version
-        GLOBALS.operator_export_type = OperatorExportTypes.ONNX
+        x = _X_2x5
         graph, params_dict, __ = self._model_to_graph(
             Module(),
             (x,),
@@ -633,9 +606,7 @@ class TestUtilityFuns(_BaseTestCase):
             input_names=["x"],
             dynamic_axes={"x": [0, 1]},
         )
-        for node in graph.nodes():
-            self.assertTrue(node.kind() != "onnx::Add")
-        self.assertEqual(len(list(graph.nodes())), 1)
+        self._assert_folded(graph, ("onnx::Add",), expected_n=1)
         params = list(params_dict.values())
         self.assertEqual(len(params), 1)
         weight = params[0]
@@ -653,9 +624,7 @@ class TestUtilityFuns(_BaseTestCase):
                 sub = self.weight - torch.tensor([1, 2, 3, 4, 5])
                 return sub + x
 
-        x = torch.randn(2, 5)
-        GLOBALS.export_onnx_opset_version = self.opset_version
-        GLOBALS.operator_export_type = OperatorExportTypes.ONNX
+        x = _X_2x5
         graph, params_dict, __ = self._model_to_graph(
             Module(),
             (x,),
@@ -664,9 +633,7 @@ class TestUtilityFuns(_BaseTestCase):
             input_names=["x"],
             dynamic_axes={"x": [0, 1]},
         )
-        for node in graph.nodes():
-            self.assertNotEqual(node.kind(), "onnx::Sub")
-        self.assertEqual(len(list(graph.nodes())), 1)
+        self._assert_folded(graph, ("onnx::Sub",), expected_n=1)
         params = list(params_dict.values())
         self.assertEqual(len(params), 1)
         weight = params[0]
@@ -684,15 +651,11 @@ class TestUtilityFuns(_BaseTestCase):
                 sqrt = torch.sqrt(self.weight)
                 return sqrt / x
 
-        x = torch.randn(2, 5)
-        GLOBALS.export_onnx_opset_version = self.opset_version
-        GLOBALS.operator_export_type = OperatorExportTypes.ONNX
+        x = _X_2x5
         graph, _, __ = self._model_to_graph(
             Module(), (x,), input_names=["x"], dynamic_axes={"x": [0, 1]}
         )
-        for node in graph.nodes():
-            self.assertNotEqual(node.kind(), "onnx::Sqrt")
-        self.assertEqual(len(list(graph.nodes())), 1)
+        self._assert_folded(graph, ("onnx::Sqrt",), expected_n=1)
 
     def test_constant_fold_shape(self):
         class ShapeModule(torch.nn.Module):
@@ -704,15 +667,11 @@ class TestUtilityFuns(_BaseTestCase):
                 shape = self.weight.shape[0]
                 return x + shape
 
-        x = torch.randn(2, 5)
-        GLOBALS.export_onnx_opset_version = self.opset_version
-        GLOBALS.operator_export_type = OperatorExportTypes.ONNX
+        x = _X_2x5
         graph, _, __ = self._model_to_graph(
             ShapeModule(), (x,), input_names=["x"], dynamic_axes={"x": [0, 1]}
         )
-        for node in graph.nodes():
-            self.assertNotEqual(node.kind(), "onnx::Shape")
-        self.assertEqual(len(list(graph.nodes())), 2)
+        self._assert_folded(graph, ("onnx::Shape",), expected_n=2)
 
     def test_constant_fold_upsample_scale_fold_as_constant(self):
         # upsample scale is a constant, not a model parameter,
@@ -721,7 +680,7 @@ class TestUtilityFuns(_BaseTestCase):
         x = torch.randn(1, 32, 224, 224)
         f = io.BytesIO()
         torch.onnx.export(model, x, f)
-        onnx_model = onnx.load(io.BytesIO(f.getvalue()))
+        onnx_model = onnx.load_model_from_string(f.getvalue())
         self.assertEqual(len(onnx_model.graph.initializer), 0)
 
     def test_verbose(self):
@@ -738,10 +697,15 @@ class TestUtilityFuns(_BaseTestCase):
                 torch.onnx.export(
                     MyModule(), x, f, verbose=verbose, opset_version=self.opset_version
                 )
-            model = onnx.load(io.BytesIO(f.getvalue()))
-            model_strip = copy.copy(model)
-            onnx.helper.strip_doc_string(model_strip)
-            return model == model_strip
+            model = onnx.load_model_from_string(f.getvalue())
+            # Inspect the doc_string fields directly rather than comparing
+            # against a stripped copy: copy.copy plus protobuf equality both
+            # walk the whole ModelProto.
+            return (
+                not model.doc_string
+                and not model.graph.doc_string
+                and not any(node.doc_string for node in model.graph.node)
+            )
 
         # test verbose=False (default)
         self.assertTrue(is_model_stripped(io.BytesIO()))
@@ -784,7 +748,7 @@ class TestUtilityFuns(_BaseTestCase):
             input_names=["x", "y"],
             dynamic_axes={"y": [1]},
         )
-        onnx_model = onnx.load(io.BytesIO(f.getvalue()))
+        onnx_model = onnx.load_model_from_string(f.getvalue())
         loop_output_value_info_proto = onnx_model.graph.output[0]
         ref_value_info_proto = onnx.helper.make_tensor_sequence_value_info(
             loop_output_value_info_proto.name, 1, [2, None]
@@ -795,7 +759,7 @@ class TestUtilityFuns(_BaseTestCase):
         f = io.BytesIO()
         y = torch.randn(2, 3)
         torch.onnx.export(script_model, (x, y), f, opset_version=self.opset_version)
-        onnx_model = onnx.load(io.BytesIO(f.getvalue()))
+        onnx_model = onnx.load_model_from_string(f.getvalue())
         loop_output_value_info_proto = onnx_model.graph.output[0]
         ref_value_info_proto = onnx.helper.make_tensor_sequence_value_info(
             loop_output_value_info_proto.name, 1, [2, 3]
@@ -912,7 +876,7 @@ class TestUtilityFuns(_BaseTestCase):
             },
         )
 
-        onnx_model = onnx.load(io.BytesIO(f.getvalue()))
+        onnx_model = onnx.load_model_from_string(f.getvalue())
 
         # Check function definition
         funcs = onnx_model.functions
@@ -946,7 +910,7 @@ class TestUtilityFuns(_BaseTestCase):
             export_modules_as_functions={torch.nn.CELU},
         )
 
-        onnx_model = onnx.load(io.BytesIO(f.getvalue()))
+        onnx_model = onnx.load_model_from_string(f.getvalue())
         funcs = onnx_model.functions
         self.assertEqual(len(funcs), 1)
         self.assertEqual(funcs[0].name, "CELU")
@@ -961,7 +925,7 @@ class TestUtilityFuns(_BaseTestCase):
             export_modules_as_functions=set(),
         )
 
-        onnx_model = onnx.load(io.BytesIO(f.getvalue()))
+        onnx_model = onnx.load_model_from_string(f.getvalue())
         funcs = onnx_model.functions
         self.assertEqual(len(funcs), 0)
 
@@ -975,7 +939,7 @@ class TestUtilityFuns(_BaseTestCase):
             export_modules_as_functions=True,
         )
 
-        onnx_model = onnx.load(io.BytesIO(f.getvalue()))
+        onnx_model = onnx.load_model_from_string(f.getvalue())
         funcs = onnx_model.functions
         self.assertEqual(len(funcs), 3)
 
@@ -1011,7 +975,7 @@ class TestUtilityFuns(_BaseTestCase):
             export_modules_as_functions={NWithOverloads},
         )
 
-        onnx_model = onnx.load(io.BytesIO(f.getvalue()))
+        onnx_model = onnx.load_model_from_string(f.getvalue())
         funcs = onnx_model.functions
         self.assertEqual(len(funcs), 3)
         func_names = [f.name for f in funcs]
@@ -1040,7 +1004,7 @@ class TestUtilityFuns(_BaseTestCase):
             do_constant_folding=False,
         )
 
-        onnx_model = onnx.load(io.BytesIO(f.getvalue()))
+        onnx_model = onnx.load_model_from_string(f.getvalue())
         funcs = onnx_model.functions
         self.assertIn("M", [f.name for f in funcs])
 
@@ -1072,7 +1036,7 @@ class TestUtilityFuns(_BaseTestCase):
             opset_version=self.opset_version,
         )
 
-        onnx_model = onnx.load(io.BytesIO(f.getvalue()))
+        onnx_model = onnx.load_model_from_string(f.getvalue())
         funcs = onnx_model.functions
         m_funcs = [fn for fn in funcs if fn.name == "M"]
         self.assertEqual(m_funcs[0].attribute, ["num_layers"])
@@ -1312,7 +1276,6 @@ class TestUtilityFuns(_BaseTestCase):
                 return torch.erfc(x)
 
         x = torch.randn(2, 3, 4)
-        GLOBALS.export_onnx_opset_version = self.opset_version
         graph, _, __ = self._model_to_graph(
             Module(),
             (x,),
@@ -1381,7 +1344,7 @@ class TestUtilityFuns(_BaseTestCase):
             custom_opsets={"com.microsoft": 1},
         )
 
-        graph = onnx.load(io.BytesIO(f.getvalue()))
+        graph = onnx.load_model_from_string(f.getvalue())
         self.assertEqual(graph.graph.node[0].op_type, "Gelu")
         self.assertEqual(graph.opset_import[0].version, self.opset_version)
         self.assertEqual(graph.opset_import[1].domain, "com.microsoft")
@@ -1400,7 +1363,7 @@ class TestUtilityFuns(_BaseTestCase):
         x = torch.randn(3, 3)
         f = io.BytesIO()
         torch.onnx.export(model, (x,), f, opset_version=self.opset_version)
-        graph = onnx.load(io.BytesIO(f.getvalue()))
+        graph = onnx.load_model_from_string(f.getvalue())
 
         self.assertEqual(graph.graph.node[0].op_type, "Gelu")
         self.assertEqual(graph.opset_import[1].domain, "com.microsoft")
@@ -1428,7 +1391,7 @@ class TestUtilityFuns(_BaseTestCase):
             custom_opsets={"com.microsoft": 1},
         )
 
-        graph = onnx.load(io.BytesIO(f.getvalue()))
+        graph = onnx.load_model_from_string(f.getvalue())
         self.assertEqual(graph.graph.node[0].op_type, "Inverse")
         self.assertEqual(graph.opset_import[0].version, self.opset_version)
         self.assertEqual(graph.opset_import[1].domain, "com.microsoft")
@@ -1580,8 +1543,6 @@ class TestUtilityFuns(_BaseTestCase):
                 return x
 
         x = torch.randn(20, 16, 50, 100)
-        GLOBALS.export_onnx_opset_version = self.opset_version
-        GLOBALS.operator_export_type = OperatorExportTypes.ONNX
         _, params_dict, __ = self._model_to_graph(
             Model(),
             (x,),
@@ -1609,8 +1570,6 @@ class TestUtilityFuns(_BaseTestCase):
 
         model = torch.jit.script(MyModule())
         x = torch.randn(10, 3, 128, 128)
-        GLOBALS.export_onnx_opset_version = self.opset_version
-        GLOBALS.operator_export_type = OperatorExportTypes.ONNX
         graph, _, __ = self._model_to_graph(
             model,
             (x,),
@@ -1667,8 +1626,7 @@ class TestUtilityFuns(_BaseTestCase):
             dynamic_axes={"x": [0, 1, 2, 3]},
         )
 
-        for node in graph.nodes():
-            self.assertNotEqual(node.kind(), "onnx::BatchNormalization")
+        self._assert_folded(graph, ("onnx::BatchNormalization",))
 
     def test_onnx_function_substitution_pass(self):
         @torch.jit.script
@@ -1682,8 +1640,6 @@ class TestUtilityFuns(_BaseTestCase):
 
         input_1 = torch.tensor([11])
         input_2 = torch.tensor([12])
-        GLOBALS.export_onnx_opset_version = self.opset_version
-        GLOBALS.operator_export_type = OperatorExportTypes.ONNX
         graph, _, __ = self._model_to_graph(
             MyModule(),
             (input_1, input_2),
@@ -1695,8 +1651,7 @@ class TestUtilityFuns(_BaseTestCase):
         # Check that the prim::Constant node in the graph for representing the
         # scripted function `f` is removed and the following prim::CallFunction
         # is replced by inline graph, with onnx::Sub and onnx::Add nodes.
-        for node in graph.nodes():
-            self.assertNotEqual(node.kind(), "prim::Constant")
+        self._assert_folded(graph, ("prim::Constant",))
         self.assertEqual(
             len(list(graph.nodes())), 2
         )  # onnx::Sub and onnx::Add nodes only.
@@ -1730,7 +1685,7 @@ class TestUtilityFuns(_BaseTestCase):
             opset_version=self.opset_version,
             keep_initializers_as_inputs=True,
         )
-        graph = onnx.load(io.BytesIO(f.getvalue()))
+        graph = onnx.load_model_from_string(f.getvalue())
         self.assertEqual(graph.graph.input[1].name, "in_weight")
         self.assertEqual(graph.graph.input[2].name, "in_bias")
 
@@ -1762,14 +1717,14 @@ class TestUtilityFuns(_BaseTestCase):
         f = io.BytesIO()
 
         torch.onnx.export(module, torch.ones(1, 10), f, output_names=["y"])
-        onnx_model = onnx.load(io.BytesIO(f.getvalue()))
+        onnx_model = onnx.load_model_from_string(f.getvalue())
         for n in onnx_model.graph.node:
             self.assertIn(n.name, ref_node_names)
 
         torch.onnx.export(
             torch.jit.script(module), torch.ones(1, 10), f, output_names=["y"]
         )
-        onnx_model = onnx.load(io.BytesIO(f.getvalue()))
+        onnx_model = onnx.load_model_from_string(f.getvalue())
         for n in onnx_model.graph.node:
             self.assertIn(n.name, ref_node_names)
 
@@ -1811,7 +1766,7 @@ class TestUtilityFuns(_BaseTestCase):
             training=TrainingMode.TRAINING,
             opset_version=self.opset_version,
         )
-        graph = onnx.load(io.BytesIO(f.getvalue()))
+        graph = onnx.load_model_from_string(f.getvalue())
         self.assertSetEqual({i.name for i in graph.graph.initializer}, param_name_set)
 
         model.train()
@@ -1823,14 +1778,14 @@ class TestUtilityFuns(_BaseTestCase):
             training=TrainingMode.PRESERVE,
             opset_version=self.opset_version,
         )
-        graph = onnx.load(io.BytesIO(f.getvalue()))
+        graph = onnx.load_model_from_string(f.getvalue())
         self.assertSetEqual({i.name for i in graph.graph.initializer}, param_name_set)
 
         # Test eval mode.
         model.eval()
         f = io.BytesIO()
         torch.onnx.export(model, (x,), f, opset_version=self.opset_version)
-        graph = onnx.load(io.BytesIO(f.getvalue()))
+        graph = onnx.load_model_from_string(f.getvalue())
         param_name_set.remove("param2")
         self.assertSetEqual({i.name for i in graph.graph.initializer}, param_name_set)
 
@@ -1859,7 +1814,7 @@ class TestUtilityFuns(_BaseTestCase):
         y = torch.randn(3, 3, device=torch.device("cuda"))
         f = io.BytesIO()
         torch.onnx.export(Model(), (x, y), f, opset_version=self.opset_version)
-        graph = onnx.load(io.BytesIO(f.getvalue()))
+        graph = onnx.load_model_from_string(f.getvalue())
         self.assertSetEqual({i.name for i in graph.graph.initializer}, {"w_cpu"})
 
     def test_duplicated_output_node(self):
@@ -1901,7 +1856,7 @@ class TestUtilityFuns(_BaseTestCase):
             keep_initializers_as_inputs=True,
         )
 
-        graph = onnx.load(io.BytesIO(f.getvalue()))
+        graph = onnx.load_model_from_string(f.getvalue())
         self.assertEqual(graph.graph.input[0].name, "input0")
         self.assertEqual(graph.graph.input[1].name, "input1")
         for i in range(5):
@@ -1927,7 +1882,7 @@ class TestUtilityFuns(_BaseTestCase):
         f = io.BytesIO()
         x = torch.randn(1, 32, 224, 224)
         torch.onnx.export(Model(), x, f)
-        onnx_model = onnx.load(io.BytesIO(f.getvalue()))
+        onnx_model = onnx.load_model_from_string(f.getvalue())
         # aten::upsample converts to onnx::resize
         resize_nodes = [n for n in onnx_model.graph.node if n.op_type == "Resize"]
         self.assertEqual(len(resize_nodes), 2)
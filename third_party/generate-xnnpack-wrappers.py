@@ -1,9 +1,11 @@
 #!/usr/bin/env python3
 
 from __future__ import print_function
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
-import collections
+import hashlib
 import os
+import re
 import sys
 import logging
 
@@ -97,112 +99,187 @@ IGNORED_SOURCES = set((
     "\"${PROJECT_BINARY_DIR}/build_identifier.c\"", # Not currently used and requires build-time codegen.
 ))
 
-def handle_singleline_parse(line):
-    start_index = line.find("(")
-    end_index = line.find(")")
-    line = line[start_index+1:end_index]
-    key_val = line.split(" ")
-    return key_val[0], [x[4:] for x in key_val[1:]]
+# Union of every section name we care about, computed once instead of per line.
+ALL_SRC_NAMES = frozenset(WRAPPER_SRC_NAMES) | frozenset(SRC_NAMES)
+
+# One compiled pattern per line shape instead of find/split/strip chains.
+_INCLUDE_RE = re.compile(r"^INCLUDE\(\s*([^)\s]+)")
+_SET_SINGLE_RE = re.compile(r"^SET\(\s*(\S+)\s+(.*?)\)\s*$")
+_SET_NAME_RE = re.compile(r"^SET\(\s*([^\s)]+)")
 
 def update_sources(xnnpack_path, cmakefile = "XNNPACK/CMakeLists.txt"):
     print(f"Updating sources from {cmakefile}")
-    sources = collections.defaultdict(list)
+    sources = {}
     with open(os.path.join(xnnpack_path, cmakefile)) as cmake:
-        lines = cmake.readlines()
-        i = 0
-        while i < len(lines):
-            line = lines[i]
-            
-            if lines[i].startswith("INCLUDE"):
-                file, _ = handle_singleline_parse(line)
+        # Stream the file instead of materializing every line up front.
+        lines = iter(cmake)
+        for line in lines:
+            include_match = _INCLUDE_RE.match(line)
+            if include_match:
+                file = include_match.group(1)
                 if file.startswith("cmake/gen/"):
                     path = Path(xnnpack_path) / "XNNPACK" / file
                     local_sources = update_sources(xnnpack_path, path.absolute().as_posix())
-                    for k,v in local_sources.items():
-                        if k in sources:
-                            sources[k] = sources[k] + local_sources[k]
-                        else:
-                            sources[k] = local_sources[k]
-
-            if lines[i].startswith("SET") and "src/" in lines[i]:
-                name, val = handle_singleline_parse(line)
-                sources[name].extend(val)
-                i+=1
+                    for k, v in local_sources.items():
+                        sources.setdefault(k, []).extend(v)
                 continue
 
-            if line.startswith("SET") and line.split('(')[1].strip(' \t\n\r') in set(WRAPPER_SRC_NAMES.keys()) | set(SRC_NAMES):
-                name = line.split('(')[1].strip(' \t\n\r')
-                i += 1
-                while i < len(lines) and len(lines[i]) > 0 and ')' not in lines[i]:
-                    # remove "src/" at the beginning, remove whitespaces and newline
-                    value = lines[i].strip(' \t\n\r')
-                    if value not in IGNORED_SOURCES:
-                        sources[name].append(value[4:])
-                    i += 1
-                if i < len(lines) and len(lines[i]) > 4:
-                    # remove "src/" at the beginning, possibly ')' at the end
-                    value = lines[i].strip(' \t\n\r)')
+            if not line.startswith("SET"):
+                continue
+
+            if "src/" in line:
+                single_match = _SET_SINGLE_RE.match(line)
+                # Interned names make the later WRAPPER_SRC_NAMES lookups
+                # hit the identity fast-path.
+                name = sys.intern(single_match.group(1))
+                sources.setdefault(name, []).extend(
+                    x.removeprefix("src/") for x in single_match.group(2).split()
+                )
+                continue
+
+            match = _SET_NAME_RE.match(line)
+            if match and match.group(1) in ALL_SRC_NAMES:
+                name = sys.intern(match.group(1))
+                # Bind the append once per section instead of hashing the
+                # section name again for every body line.
+                append = sources.setdefault(name, []).append
+                for body_line in lines:
+                    if ')' in body_line:
+                        if len(body_line) > 4:
+                            # possibly ')' at the end
+                            value = body_line.strip(' \t\n\r)')
+                            if value not in IGNORED_SOURCES:
+                                append(value.removeprefix("src/"))
+                        break
+                    value = body_line.strip(' \t\n\r')
                     if value not in IGNORED_SOURCES:
-                        sources[name].append(value[4:])
-            else:
-                i += 1
-    return sources
+                        append(value.removeprefix("src/"))
+    # Tuples are immutable and slightly more compact; everything downstream
+    # only iterates.
+    return {k: tuple(v) for k, v in sources.items()}
+
+# Architecture- or platform-dependent preprocessor flags can be
+# defined here. Note: platform_preprocessor_flags can't be used
+# because they are ignored by arc focus & buck project.
+_WRAPPER_TEMPLATE = f"/* {BANNER} */\n\n{{includes}}"
+# Include source files only if condition is satisfied
+_WRAPPER_COND_TEMPLATE = (
+    f"/* {BANNER} */\n\n"
+    "#if {condition}\n{includes}#endif /* {condition} */\n"
+)
+
+def _write_wrapper(task):
+    filepath, condition, filenames = task
+    includes = "".join(f"#include <{filename}>\n" for filename in filenames)
+    if condition is None:
+        content = _WRAPPER_TEMPLATE.format(includes=includes)
+    else:
+        content = _WRAPPER_COND_TEMPLATE.format(condition=condition, includes=includes)
+    # Skip unchanged files so their mtime survives for downstream
+    # incremental builds.
+    try:
+        with open(filepath) as existing:
+            if existing.read() == content:
+                return
+    except OSError:
+        pass
+    with open(filepath, "w") as wrapper:
+        # One write per file instead of one per line.
+        wrapper.write(content)
+
+def _write_bzl(bzl_name, names, sources, entry_format):
+    # Assemble the whole file in memory and write it once; per-line print()
+    # here meant one format + write pair per source file.
+    parts = [f'"""\n{BANNER}\n"""\n']
+    for name in names:
+        body = "\n".join(
+            '    "{}",'.format(entry_format.format(file_name))
+            for file_name in sources.get(name, ())
+        )
+        if body:
+            body += "\n"
+        parts.append(f"\n{name} = [\n{body}]\n")
+    with open(os.path.join(os.path.dirname(__file__), bzl_name), "w") as f:
+        f.write("".join(parts))
+
+def _inputs_digest(xnnpack_path):
+    # The generated outputs are determined by the top-level CMakeLists plus
+    # every cmake/gen/ list update_sources can reach through INCLUDE
+    # recursion, so hash all of them (names included, so renames count).
+    h = hashlib.blake2b(digest_size=16)
+    cmake_inputs = [Path(xnnpack_path, "XNNPACK", "CMakeLists.txt")]
+    cmake_inputs.extend(
+        sorted(Path(xnnpack_path, "XNNPACK", "cmake", "gen").glob("*.cmake"))
+    )
+    for cmakefile in cmake_inputs:
+        h.update(cmakefile.name.encode())
+        h.update(cmakefile.read_bytes())
+    return h.hexdigest()
 
 def gen_wrappers(xnnpack_path):
-    xnnpack_sources = collections.defaultdict(list)
+    # Regeneration is pure function of the CMake inputs; skip it entirely
+    # when they are unchanged since the last run.
+    digest = _inputs_digest(xnnpack_path)
+    stamp_path = os.path.join(xnnpack_path, "xnnpack_wrappers", ".stamp")
+    try:
+        with open(stamp_path) as stamp:
+            if stamp.read() == digest:
+                print("CMake inputs unchanged, skipping wrapper generation")
+                return
+    except OSError:
+        pass
+
     sources = update_sources(xnnpack_path)
 
     microkernels_sources = update_sources(xnnpack_path, "XNNPACK/cmake/gen/microkernels.cmake")
     for key in  microkernels_sources:
         sources[key] = microkernels_sources[key]
 
-    for name in WRAPPER_SRC_NAMES:
-        xnnpack_sources[WRAPPER_SRC_NAMES[name]].extend(sources[name])
+    # One aggregated wrapper per C source section turns thousands of
+    # three-line translation units into one TU per section, while keeping
+    # the per-section lists (and any per-section compile flags attached to
+    # them downstream) intact. Assembly sections stay one wrapper per file:
+    # concatenating .S sources into a single TU risks macro and label
+    # collisions.
+    tasks = []
+    wrapper_sources = {}
+    for name, condition in WRAPPER_SRC_NAMES.items():
+        print(name)
+        filenames = sources.get(name, ())
+        if name.endswith("_ASM_MICROKERNEL_SRCS"):
+            for filename in filenames:
+                filepath = os.path.join(xnnpack_path, "xnnpack_wrappers", filename)
+                tasks.append((filepath, condition, (filename,)))
+            wrapper_sources[name] = filenames
+        elif filenames:
+            aggregated = name.lower() + ".c"
+            filepath = os.path.join(xnnpack_path, "xnnpack_wrappers", aggregated)
+            tasks.append((filepath, condition, filenames))
+            wrapper_sources[name] = (aggregated,)
+        else:
+            wrapper_sources[name] = ()
 
-    for condition, filenames in xnnpack_sources.items():
-        print(condition)
-        for filename in filenames:
-            filepath = os.path.join(xnnpack_path, "xnnpack_wrappers", filename)
+    # Create each unique parent directory once up front instead of stat'ing
+    # it again for every file it contains.
+    for dirpath in {os.path.dirname(filepath) for filepath, _, _ in tasks}:
+        os.makedirs(dirpath, exist_ok=True)
 
-            if not os.path.isdir(os.path.dirname(filepath)):
-                os.makedirs(os.path.dirname(filepath))
-            with open(filepath, "w") as wrapper:
-                print("/* {} */".format(BANNER), file=wrapper)
-                print(file=wrapper)
-
-                # Architecture- or platform-dependent preprocessor flags can be
-                # defined here. Note: platform_preprocessor_flags can't be used
-                # because they are ignored by arc focus & buck project.
-
-                if condition is None:
-                    print("#include <%s>" % filename, file=wrapper)
-                else:
-                    # Include source file only if condition is satisfied
-                    print("#if %s" % condition, file=wrapper)
-                    print("#include <%s>" % filename, file=wrapper)
-                    print("#endif /* %s */" % condition, file=wrapper)
+    # The per-wrapper work is pure file I/O, so overlap the write syscalls.
+    with ThreadPoolExecutor(max_workers=8) as executor:
+        list(executor.map(_write_wrapper, tasks))
 
     # update xnnpack_wrapper_defs.bzl file under the same folder
-    with open(os.path.join(os.path.dirname(__file__), "xnnpack_wrapper_defs.bzl"), 'w') as wrapper_defs:
-        print('"""', file=wrapper_defs)
-        print(BANNER, file=wrapper_defs)
-        print('"""', file=wrapper_defs)
-        for name in WRAPPER_SRC_NAMES:
-            print('\n' + name + ' = [', file=wrapper_defs)
-            for file_name in sources[name]:
-                print('    "xnnpack_wrappers/{}",'.format(file_name), file=wrapper_defs)
-            print(']', file=wrapper_defs)
+    _write_bzl("xnnpack_wrapper_defs.bzl", WRAPPER_SRC_NAMES, wrapper_sources, "xnnpack_wrappers/{}")
 
     # update xnnpack_src_defs.bzl file under the same folder
-    with open(os.path.join(os.path.dirname(__file__), "xnnpack_src_defs.bzl"), 'w') as src_defs:
-        print('"""', file=src_defs)
-        print(BANNER, file=src_defs)
-        print('"""', file=src_defs)
-        for name in SRC_NAMES:
-            print('\n' + name + ' = [', file=src_defs)
-            for file_name in sources[name]:
-                print('    "XNNPACK/src/{}",'.format(file_name), file=src_defs)
-            print(']', file=src_defs)
+    _write_bzl("xnnpack_src_defs.bzl", SRC_NAMES, sources, "XNNPACK/src/{}")
+
+    # Record the inputs that produced these outputs; write atomically so a
+    # crash mid-write cannot leave a stamp matching stale outputs.
+    tmp_path = stamp_path + ".tmp"
+    with open(tmp_path, "w") as stamp:
+        stamp.write(digest)
+    os.replace(tmp_path, stamp_path)
 
 
 def main(argv):
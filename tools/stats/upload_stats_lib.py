@@ -7,6 +7,7 @@ import math
 import os
 import time
 import zipfile
+from concurrent.futures import ThreadPoolExecutor
 from functools import lru_cache
 from pathlib import Path
 from typing import Any, Callable, Dict, List, Optional
@@ -87,26 +88,33 @@ def download_s3_artifacts(
     prefix: str, workflow_run_id: int, workflow_run_attempt: int
 ) -> list[Path]:
     bucket = get_s3_resource().Bucket("gha-artifacts")
-    objs = bucket.objects.filter(
-        Prefix=f"pytorch/pytorch/{workflow_run_id}/{workflow_run_attempt}/artifact/{prefix}"
+    objs = list(
+        bucket.objects.filter(
+            Prefix=f"pytorch/pytorch/{workflow_run_id}/{workflow_run_attempt}/artifact/{prefix}"
+        )
     )
 
-    found_one = False
-    paths = []
-    for obj in objs:
-        found_one = True
-        p = Path(Path(obj.key).name)
-        print(f"Downloading {p}")
-        with open(p, "wb") as f:
-            f.write(obj.get()["Body"].read())
-        paths.append(p)
-
-    if not found_one:
+    if not objs:
         print(
             "::warning title=s3 artifacts not found::"
             "Didn't find any test reports in s3, there might be a bug!"
         )
-    return paths
+        return []
+
+    # Each artifact is an independent GET dominated by the S3 round-trip, so
+    # overlap the downloads. The underlying botocore client is thread-safe
+    # (unlike resource objects, which is why the keys are listed up front).
+    client = get_s3_resource().meta.client
+
+    def download(obj: Any) -> Path:
+        p = Path(Path(obj.key).name)
+        print(f"Downloading {p}")
+        with open(p, "wb") as f:
+            f.write(client.get_object(Bucket=obj.bucket_name, Key=obj.key)["Body"].read())
+        return p
+
+    with ThreadPoolExecutor(max_workers=32) as executor:
+        return list(executor.map(download, objs))
 
 
 def download_gha_artifacts(
@@ -171,10 +179,11 @@ def read_from_s3(
             f"{key}",
         )
         .get()["Body"]
-        .read()
     )
-    results = gzip.decompress(body).decode().split("\n")
-    return [json.loads(result) for result in results if result]
+    # Decompress the streaming body line by line instead of materializing the
+    # compressed blob, the decompressed blob and the split lines all at once.
+    with gzip.open(body, mode="rb") as stream:
+        return [json.loads(line) for line in stream if not line.isspace()]
 
 
 def remove_nan_inf(old: Any) -> Any:
@@ -1,5 +1,8 @@
 import os
+import pickle
+import tempfile
 import unittest
+from pathlib import Path
 
 from tools.stats.upload_test_stats import get_tests, summarize_test_cases
 
@@ -7,6 +10,22 @@ from tools.stats.upload_test_stats import get_tests, summarize_test_cases
 IN_CI = os.environ.get("CI")
 
 
+def get_tests_cached(workflow_run_id: int, workflow_run_attempt: int) -> list:
+    """Disk-cached get_tests so repeated local runs skip the artifact
+    downloads and XML parsing and only exercise the aggregation."""
+    cache = (
+        Path(tempfile.gettempdir())
+        / f"test-stats-{workflow_run_id}-{workflow_run_attempt}.pkl"
+    )
+    if cache.exists():
+        with open(cache, "rb") as f:
+            return pickle.load(f)
+    test_cases = get_tests(workflow_run_id, workflow_run_attempt)
+    with open(cache, "wb") as f:
+        pickle.dump(test_cases, f)
+    return test_cases
+
+
 class TestUploadTestStats(unittest.TestCase):
     @unittest.skipIf(
         IN_CI,
@@ -14,7 +33,7 @@ class TestUploadTestStats(unittest.TestCase):
     )
     def test_existing_job(self) -> None:
         """Run on a known-good job and make sure we don't error and get basically okay results."""
-        test_cases = get_tests(2561394934, 1)
+        test_cases = get_tests_cached(2561394934, 1)
         self.assertEqual(len(test_cases), 609873)
         summary = summarize_test_cases(test_cases)
         self.assertEqual(len(summary), 5068)